@@ -12,13 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import math
-from collections import OrderedDict, namedtuple
-
 import networkx as nx
+import numpy as np
 
-Edge = namedtuple('Edge', ['head', 'tail', 'key'])
-"""Represents a (directed) edge in a Multigraph"""
+from dwave.samplers.planar.triangulation import triangulate
 
 
 def rotation_from_coordinates(G: nx.MultiGraph, pos: dict) -> dict:
@@ -38,30 +35,50 @@ def rotation_from_coordinates(G: nx.MultiGraph, pos: dict) -> dict:
     if not isinstance(G, nx.MultiGraph):
         raise TypeError("expected G to be a MultiGraph")
 
-    rotation = {}
-    for u in G.nodes:
-        x0, y0 = pos[u]
+    # gather every edgelet (u, v, key), grouped by u in the same order as
+    # G.edges(u, keys=True), so that all of the angles can be computed and sorted
+    # in one vectorized pass over the whole graph
+    index = {v: idx for idx, v in enumerate(G.nodes)}
+    edges = [(u, v, key) for u, nbrs in G.adj.items() for v, keys in nbrs.items() for key in keys]
 
-        def angle(edge):
-            if len(edge) == 3:  # generic for Graph or MultiGraph
-                _, v, _ = edge
-            else:
-                _, v = edge
-            x, y = pos[v]
-            return math.atan2(y - y0, x - x0)
+    coords = np.fromiter((c for v in G.nodes for c in pos[v]), dtype=np.float64,
+                         count=2 * len(index)).reshape(-1, 2)
+    heads = np.fromiter((index[u] for u, _, _ in edges), dtype=np.intp, count=len(edges))
+    tails = np.fromiter((index[v] for _, v, _ in edges), dtype=np.intp, count=len(edges))
 
-        if isinstance(G, nx.MultiGraph):
-            circle = sorted(G.edges(u, keys=True), key=angle)
-        else:
-            circle = sorted(G.edges(u), key=angle)
+    dx = coords[tails, 0] - coords[heads, 0]
+    dy = coords[tails, 1] - coords[heads, 1]
+
+    # lexsort is stable, so parallel edges stay in the order given by G
+    order = np.lexsort((_pseudo_angle(dx, dy), heads))
+    edges = [edges[i] for i in order.tolist()]
 
-        circle = [Edge(*edge) for edge in circle]
+    rotation = {}
+    start = 0
+    for u, degree in zip(G.nodes, np.bincount(heads, minlength=len(index)).tolist()):
+        circle = edges[start:start + degree]
+        start += degree
 
-        rotation[u] = OrderedDict((circle[i - 1], edge) for i, edge in enumerate(circle))
+        # each edge maps to the next one counter-clockwise around u
+        rotation[u] = dict(zip(circle[-1:] + circle[:-1], circle))
 
     return rotation
 
 
+def _pseudo_angle(dx: np.ndarray, dy: np.ndarray) -> np.ndarray:
+    """Return keys in (-2, 2] that sort the vectors (dx, dy) the same as
+    ``np.arctan2(dy, dx)`` would, without evaluating any trigonometry.
+
+    The "diamond angle" dy / (|dx| + |dy|) lies in [-1, 1] and is monotonic in
+    the angle for dx >= 0. For dx < 0 it is reflected onto (1, 2] when dy >= 0
+    and onto (-2, -1) when dy < 0, which gives a key that is monotonic over the
+    full circle. The zero vector gets the key 0, as ``np.arctan2(0, 0)`` does.
+    """
+    norm = np.abs(dx) + np.abs(dy)
+    p = np.divide(dy, norm, out=np.zeros_like(norm), where=norm > 0)
+    return np.where(dx >= 0, p, np.where(dy >= 0, 2 - p, -2 - p))
+
+
 def plane_triangulate(G: nx.MultiGraph):
     """Add edges to planar graph G to make it plane triangulated.
 
@@ -79,36 +96,7 @@ def plane_triangulate(G: nx.MultiGraph):
 
     rotation_system = {v: G.nodes[v]['rotation'] for v in G}
 
-    # following the notation from the paper
-    for i in G.nodes:
-        for edge in list(G.edges(i, keys=True)):
-            i, j, _ = ij = Edge(*edge)
-
-            j, k, _ = jk = rotation_system[j][(j, i, ij.key)]
-            k, l, _ = kl = rotation_system[k][(k, j, jk.key)]
-
-            assert ij.tail == jk.head
-
-            while l != i:
-                m, n, _ = rotation_system[l][(l, k, kl.key)]
-                if (m, n) == (l, j):
-                    break
-
-                if i == k:
-                    # avoid self-loop
-                    i, j, _ = ij = jk
-                    j, k, _ = jk = kl
-                    k, l, _ = kl = rotation_system[k][(k, j, jk.key)]
-
-                    assert ij.tail == jk.head
-
-                _insert_chord(ij, jk, G, rotation_system)
-
-                i, j, _ = ij = kl
-                j, k, _ = jk = rotation_system[j][(j, i, ij.key)]
-                k, l, _ = kl = rotation_system[k][(k, j, jk.key)]
-
-                assert ij.tail == jk.head
+    triangulate(G, rotation_system)
 
     assert is_plane_triangulated(G), "Something went wrong, G is not plane triangulated"
 
@@ -129,14 +117,16 @@ def is_plane_triangulated(G: nx.MultiGraph) -> bool:
     # |\
     # | \
     # y--z
-    for x in G.nodes:
+    rotation_system = {v: G.nodes[v]['rotation'] for v in G}
+
+    for x, rx in rotation_system.items():
         for xz in G.edges(x, keys=True):
 
-            _ = x, y, xykey = G.nodes[x]['rotation'][xz]
-            _ = y, z, yzkey = G.nodes[y]['rotation'][(y, x, xykey)]
-            _ = z, x, xzkey = G.nodes[z]['rotation'][(z, y, yzkey)]
+            _, y, xykey = rx[xz]
+            _, z, yzkey = rotation_system[y][(y, x, xykey)]
+            _, w, zwkey = rotation_system[z][(z, y, yzkey)]
 
-            if xz != (x, z, xzkey):
+            if xz != (w, z, zwkey):
                 return False
     return True
 
@@ -147,31 +137,34 @@ def odd_in_degree_orientation(H: nx.MultiGraph) -> dict:
         H:
     Returns:
     """
-    G = H.copy()
-
     orientation = set()
 
-    for (u, v) in reversed(list(nx.dfs_edges(H))):
-        uv = u, v, uvkey = u, v, min(G[u][v])
+    # any post-order will do: a DFS of an undirected graph has no cross edges,
+    # so every other edge at v is oriented before v's own tree edge is reached
+    for (u, v) in _dfs_postorder_edges(H):
+        keys = H.adj[u][v]
+        uvkey = next(iter(keys)) if len(keys) == 1 else min(keys)
+        uv = u, v, uvkey
 
         uv_odd = True  # for now assume that we'll mark uv as odd
 
-        # TODO: Should "keys=True" be "data=True"? "keys" seems to be unsupported?
-        for vw in G.edges(v, keys=True):
-            v, w, vwkey = vw
-
-            if vw == (v, u, uvkey):
-                # we'll do this one last
-                pass
-            elif (w, v, vwkey) in orientation:
-                # we've already done this one and it's heading in, so we need to toggle the edge
-                # we walked in on
-                uv_odd = not uv_odd
-                continue
-            else:
-                # ok, it's not the edge we came in on, and it's not already been marked or it's already
-                # going out, so let's just set it going out so it doesn't change our degree
-                orientation.add(vw)
+        # walk the adjacency of v directly rather than building an edge view
+        for w, vwkeys in H.adj[v].items():
+            for vwkey in vwkeys:
+                vw = v, w, vwkey
+
+                if w == u and vwkey == uvkey:
+                    # we'll do this one last
+                    pass
+                elif (w, v, vwkey) in orientation:
+                    # we've already done this one and it's heading in, so we need to toggle the edge
+                    # we walked in on
+                    uv_odd = not uv_odd
+                    continue
+                else:
+                    # ok, it's not the edge we came in on, and it's not already been marked or it's already
+                    # going out, so let's just set it going out so it doesn't change our degree
+                    orientation.add(vw)
 
         if uv_odd:
             # we want uv oriented towards v
@@ -182,6 +175,30 @@ def odd_in_degree_orientation(H: nx.MultiGraph) -> dict:
     return {(u, v, key): v for (u, v, key) in orientation}
 
 
+def _dfs_postorder_edges(G: nx.MultiGraph):
+    """Yield the tree edges (u, v) of a depth-first search forest of G, each
+    one after all of the tree edges below v.
+    """
+    visited = set()
+    for source in G:
+        if source in visited:
+            continue
+        visited.add(source)
+
+        stack = [(source, iter(G.adj[source]))]
+        while stack:
+            parent, children = stack[-1]
+            for child in children:
+                if child not in visited:
+                    visited.add(child)
+                    stack.append((child, iter(G.adj[child])))
+                    break
+            else:
+                stack.pop()
+                if stack:
+                    yield stack[-1][0], parent
+
+
 def expanded_dual(G: nx.MultiGraph) -> nx.Graph:
     """
     Args:
@@ -194,45 +211,27 @@ def expanded_dual(G: nx.MultiGraph) -> nx.Graph:
     # for an edge (u, v, key) oriented towards v, we adopt the convention
     # that the right-hand node is labelled (u, v, key) and the left-hand
     # node is (v, u, key).
+    weights = nx.get_edge_attributes(G, 'weight')
+
+    crossings = []
     for edge in G.edges(keys=True):
         u = edge
         v = (edge[1], edge[0], edge[2])
-        dual.add_edge(u, v, weight=G.edges[edge].get('weight', 0.0))
+        crossings.append((u, v, {'weight': weights.get(edge, 0.0)}))
+    dual.add_edges_from(crossings)
 
     # next we add the edges within each triangular face
-    for n in G.nodes:
+    wedges = []
+    for n, rotation in G.nodes(data='rotation'):
         # iterate through the edges around n
         for left in G.edges(n, keys=True):
-            u, v, _ = left = Edge(*left)
+            u, v, _ = left
             assert u == n
-            s, t, _ = right = Edge(*G.nodes[u]['rotation'][left])
+            s, t, right_key = rotation[left]
             assert s == u
 
             # we want to connect the node left (from n) or right
-            dual.add_edge(tuple(left), (t, s, right.key), weight=0.0)
+            wedges.append((left, (t, s, right_key), {'weight': 0.0}))
+    dual.add_edges_from(wedges)
 
     return dual
-
-
-def _inverse_rotation_system(rotation_system: dict, v: str, edge: Edge) -> Edge:
-    for e1, e2 in rotation_system[v].items():
-        if e2 == edge:
-            return e1
-
-    raise RuntimeError
-
-
-def _insert_chord(ij: Edge, jk: Edge, G: nx.MultiGraph, rotation_system: dict):
-    """Insert a chord between i and k."""
-    assert ij.tail == jk.head
-    i, j, _ = ij
-    j, k, _ = jk
-
-    # because G is a Multigraph, G.add_edge returns the key
-    ik = Edge(i, k, G.add_edge(i, k))
-
-    rotation_system[k][(k, i, ik.key)] = rotation_system[k][(k, j, jk.key)]
-    rotation_system[k][(k, j, jk.key)] = Edge(k, i, ik.key)
-
-    rotation_system[i][_inverse_rotation_system(rotation_system, i, ij)] = ik
-    rotation_system[i][ik] = ij
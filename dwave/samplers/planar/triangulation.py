@@ -0,0 +1,150 @@
+# Copyright 2022 D-Wave Systems Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import networkx as nx
+
+
+def triangulate(G: nx.MultiGraph, rotation_system: dict):
+    """Insert chords into the faces of an embedded graph until each is a triangle.
+
+    The traversal runs over integer edgelet (directed half-edge) ids. Edgelet
+    ``e`` leaves vertex ``head[e]`` for ``tail[e]``, ``e ^ 1`` is the reverse
+    edgelet and ``next_ccw[e]``/``prev_ccw[e]`` are its neighbours in the
+    rotation around ``head[e]``.
+
+    Args:
+        G: A planar MultiGraph. The chords are added to it in-place.
+        rotation_system: The rotation dict of each node of G. It is updated
+            in-place to include the chords.
+
+    """
+    nodes = list(G.nodes)
+    index = {n: idx for idx, n in enumerate(nodes)}
+
+    # the two edgelets of an edge are labelled 2m and 2m + 1 so that the twin of
+    # edgelet e is e ^ 1
+    edgelets = []
+    for u, w, key in G.edges(keys=True):
+        edgelets.append((u, w, key))
+        edgelets.append((w, u, key))
+    ids = {edge: e for e, edge in enumerate(edgelets)}
+
+    head = [index[edge[0]] for edge in edgelets]
+    tail = [index[edge[1]] for edge in edgelets]
+    next_ccw = [ids[rotation_system[edge[0]][edge]] for edge in edgelets]
+    prev_ccw = [0] * len(edgelets)
+    for e, succ in enumerate(next_ccw):
+        prev_ccw[succ] = e
+
+    # marks the edgelets whose face is known to be a triangle. Chords only ever
+    # split faces that are not yet triangles so these never need to be walked
+    triangulated = [False] * len(edgelets)
+
+    num_edgelets = len(edgelets)
+
+    # following the notation from the paper
+    adj = G.adj
+    add_edge = G.add_edge
+    for v in range(len(nodes)):
+        n = nodes[v]
+
+        # snapshot in the order of G.edges(n, keys=True), chords inserted at n
+        # while walking its faces are not revisited
+        for ij in [ids[(n, w, key)] for w, keys in adj[n].items() for key in keys]:
+            if triangulated[ij]:
+                continue
+
+            jk = next_ccw[ij ^ 1]
+            kl = next_ccw[jk ^ 1]
+
+            if tail[kl] == v:
+                # the face is already a triangle (or v is a cut vertex and it
+                # will be reached again), nothing to do
+                if next_ccw[kl ^ 1] == ij:
+                    triangulated[jk] = triangulated[kl] = True
+                continue
+
+            i, j, k, l = v, tail[ij], tail[jk], tail[kl]
+
+            while l != i:
+                if tail[next_ccw[kl ^ 1]] == j:
+                    break
+
+                if i == k:
+                    # avoid self-loop
+                    ij, jk = jk, kl
+                    kl = next_ccw[jk ^ 1]
+                    i, j, k, l = head[ij], tail[ij], tail[jk], tail[kl]
+
+                _insert_chord(add_edge, nodes, edgelets, ids, i, k, ij, jk,
+                              head, tail, next_ccw, prev_ccw)
+
+                # the chord closes the triangle (ki, ij, jk)
+                triangulated.append(False)
+                triangulated.append(True)
+                triangulated[ij] = triangulated[jk] = True
+
+                ij = kl
+                jk = next_ccw[ij ^ 1]
+                kl = next_ccw[jk ^ 1]
+                i, j, k, l = head[ij], tail[ij], tail[jk], tail[kl]
+            else:
+                if next_ccw[kl ^ 1] == ij:
+                    triangulated[ij] = triangulated[jk] = triangulated[kl] = True
+
+    # only the chords and the edgelets now followed by a chord have a new
+    # successor, so only their rotations need to be rewritten
+    for c in range(num_edgelets, len(edgelets)):
+        for e in (c, prev_ccw[c]):
+            edge = edgelets[e]
+            rotation_system[edge[0]][edge] = edgelets[next_ccw[e]]
+
+
+def _insert_chord(add_edge, nodes: list, edgelets: list, ids: dict,
+                  i: int, k: int, ij: int, jk: int,
+                  head: list, tail: list, next_ccw: list, prev_ccw: list):
+    """Insert a chord between i and k as the edgelets ik and ik ^ 1."""
+    u = nodes[i]
+    v = nodes[k]
+
+    # add the chord to G right away so that later vertices find it in G.adj.
+    # Because G is a Multigraph, add_edge returns the key
+    key = add_edge(u, v)
+
+    ik = len(head)
+    ki = ik + 1
+    kj = jk ^ 1
+
+    hi = prev_ccw[ij]
+    kn = next_ccw[kj]
+
+    edgelets.append((u, v, key))
+    edgelets.append((v, u, key))
+    ids[(u, v, key)] = ik
+    ids[(v, u, key)] = ki
+
+    head.append(i)
+    head.append(k)
+    tail.append(k)
+    tail.append(i)
+
+    # ik goes immediately before ij around i and ki immediately after kj around k
+    next_ccw.append(ij)
+    next_ccw.append(kn)
+    prev_ccw.append(hi)
+    prev_ccw.append(kj)
+    next_ccw[hi] = ik
+    prev_ccw[ij] = ik
+    next_ccw[kj] = ki
+    prev_ccw[kn] = ki
@@ -12,13 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import math
 import unittest
 from collections import OrderedDict
 
 import networkx as nx
 
-from dwave.samplers.planar.planar import rotation_from_coordinates, Edge, plane_triangulate, odd_in_degree_orientation,\
-    expanded_dual
+from dwave.samplers.planar.planar import rotation_from_coordinates, plane_triangulate, odd_in_degree_orientation,\
+    expanded_dual, is_plane_triangulated, _dfs_postorder_edges
 
 
 class TestSetRotationFromCoords(unittest.TestCase):
@@ -65,18 +66,39 @@ class TestSetRotationFromCoords(unittest.TestCase):
         self.assertTrue(len(G) == 0)
         self.assertTrue(len(r) == 0)
 
+    def test_all_quadrants(self):
+        # off-axis neighbours in every quadrant, the negative axes and a
+        # neighbour at the same position as the centre
+        pos = {0: (0, 0),
+               1: (2, 1), 2: (1, 3),  # dx > 0, dy > 0
+               3: (-1, 2), 4: (-3, 1),  # dx < 0, dy > 0
+               5: (-1, 0),  # dx < 0, dy == 0
+               6: (-2, -1), 7: (-1, -3),  # dx < 0, dy < 0
+               8: (0, -1),  # dx == 0, dy < 0
+               9: (1, -2), 10: (3, -1),  # dx > 0, dy < 0
+               11: (0, 0)}  # zero vector
+
+        G = nx.star_graph(11, nx.MultiGraph())
+
+        r = rotation_from_coordinates(G, pos)
+
+        circle = sorted(G.edges(0, keys=True),
+                        key=lambda e: math.atan2(pos[e[1]][1], pos[e[1]][0]))
+        self.assertEqual(r[0], {circle[i - 1]: edge for i, edge in enumerate(circle)})
+        self.assertEqual([v for _, v, _ in circle], [6, 7, 8, 9, 10, 11, 1, 2, 3, 4, 5])
+
 
 class TestPlaneTriangulation(unittest.TestCase):
     def test_triangle(self):
         # should do nothing
         G = nx.cycle_graph(3, create_using=nx.MultiGraph())
 
-        G.nodes[0]['rotation'] = OrderedDict([(Edge(0, 2, 0), Edge(0, 1, 0)),
-                                             (Edge(0, 1, 0), Edge(0, 2, 0))])
-        G.nodes[1]['rotation'] = OrderedDict([(Edge(1, 0, 0), Edge(1, 2, 0)),
-                                             (Edge(1, 2, 0), Edge(1, 0, 0))])
-        G.nodes[2]['rotation'] = OrderedDict([(Edge(2, 1, 0), Edge(2, 0, 0)),
-                                             (Edge(2, 0, 0), Edge(2, 1, 0))])
+        G.nodes[0]['rotation'] = OrderedDict([((0, 2, 0), (0, 1, 0)),
+                                             ((0, 1, 0), (0, 2, 0))])
+        G.nodes[1]['rotation'] = OrderedDict([((1, 0, 0), (1, 2, 0)),
+                                             ((1, 2, 0), (1, 0, 0))])
+        G.nodes[2]['rotation'] = OrderedDict([((2, 1, 0), (2, 0, 0)),
+                                             ((2, 0, 0), (2, 1, 0))])
 
         plane_triangulate(G)
 
@@ -88,10 +110,10 @@ class TestPlaneTriangulation(unittest.TestCase):
         # should add an edge between 0, 2
         G = nx.path_graph(3, create_using=nx.MultiGraph())
 
-        G.nodes[0]['rotation'] = OrderedDict([(Edge(0, 1, 0), Edge(0, 1, 0))])
-        G.nodes[1]['rotation'] = OrderedDict([(Edge(1, 0, 0), Edge(1, 2, 0)),
-                                             (Edge(1, 2, 0), Edge(1, 0, 0))])
-        G.nodes[2]['rotation'] = OrderedDict([(Edge(2, 1, 0), Edge(2, 1, 0))])
+        G.nodes[0]['rotation'] = OrderedDict([((0, 1, 0), (0, 1, 0))])
+        G.nodes[1]['rotation'] = OrderedDict([((1, 0, 0), (1, 2, 0)),
+                                             ((1, 2, 0), (1, 0, 0))])
+        G.nodes[2]['rotation'] = OrderedDict([((2, 1, 0), (2, 1, 0))])
 
         plane_triangulate(G)
 
@@ -129,6 +151,20 @@ class TestPlaneTriangulation(unittest.TestCase):
         # a test. For now let's just use this as a smoke test
         self.assertTrue(nx.is_biconnected(G))  # we do know planar triangular are biconnected
 
+    def test_k5_embedded_on_a_surface(self):
+        # not a plane embedding, so it takes more chords than a plane
+        # triangulation has room for, but every face still ends up a triangle
+        G = nx.complete_graph(5, create_using=nx.MultiGraph())
+
+        circles = {0: [4, 1, 2, 3], 1: [4, 3, 2, 0], 2: [0, 4, 3, 1], 3: [4, 0, 2, 1], 4: [2, 3, 0, 1]}
+        for u, circle in circles.items():
+            G.nodes[u]['rotation'] = {(u, v, 0): (u, w, 0) for v, w in zip(circle, circle[1:] + circle[:1])}
+
+        plane_triangulate(G)
+
+        self.assertEqual(G.number_of_edges(), 10 + 17)
+        self.assertTrue(is_plane_triangulated(G))
+
 
 class TestOddEdgeOrientation(unittest.TestCase):
     def test_triangle(self):
@@ -194,6 +230,32 @@ class TestOddEdgeOrientation(unittest.TestCase):
                         for v in G) >= len(G) - 1)
 
 
+class TestDFSPostorderEdges(unittest.TestCase):
+    def test_disconnected_multigraph(self):
+        G = nx.MultiGraph()
+        G.add_edges_from([(0, 1), (0, 1), (1, 2), (2, 0), (0, 3), (3, 4), (1, 5)])
+        G.add_edges_from([(6, 7), (7, 8), (8, 6), (8, 6)])
+        G.add_node(9)
+
+        edges = list(_dfs_postorder_edges(G))
+
+        # a spanning forest, one tree per connected component
+        forest = nx.Graph(edges)
+        forest.add_nodes_from(G)
+        self.assertTrue(nx.is_forest(forest))
+        self.assertEqual(len(edges), len(G) - nx.number_connected_components(G))
+        for u, v in edges:
+            self.assertIn(v, G.adj[u])
+
+        # each edge (u, v) comes after every edge below v
+        parent = {v: u for u, v in edges}
+        for idx, (u, v) in enumerate(edges):
+            for _, w in edges[idx + 1:]:
+                while w in parent and w != v:
+                    w = parent[w]
+                self.assertNotEqual(w, v)
+
+
 class TestExpandedDual(unittest.TestCase):
     def test_three_cycle(self):
         G = nx.cycle_graph(3, create_using=nx.MultiGraph())
@@ -235,18 +297,18 @@ class TestExpandedDual(unittest.TestCase):
 
         # pos = {0: (0, 0), 1: (1, 0), 2: (1, 1), 3: (0, 1)}
 
-        r = {0: OrderedDict([(Edge(head=0, tail=3, key=0), Edge(head=0, tail=2, key=0)),
-                             (Edge(head=0, tail=1, key=0), Edge(head=0, tail=3, key=0)),
-                             (Edge(head=0, tail=2, key=0), Edge(head=0, tail=1, key=0))]),
-             1: OrderedDict([(Edge(head=1, tail=0, key=0), Edge(head=1, tail=2, key=0)),
-                             (Edge(head=1, tail=2, key=0), Edge(head=1, tail=3, key=0)),
-                             (Edge(head=1, tail=3, key=0), Edge(head=1, tail=0, key=0))]),
-             2: OrderedDict([(Edge(head=2, tail=3, key=0), Edge(head=2, tail=1, key=0)),
-                             (Edge(head=2, tail=1, key=0), Edge(head=2, tail=0, key=0)),
-                             (Edge(head=2, tail=0, key=0), Edge(head=2, tail=3, key=0))]),
-             3: OrderedDict([(Edge(head=3, tail=2, key=0), Edge(head=3, tail=0, key=0)),
-                             (Edge(head=3, tail=0, key=0), Edge(head=3, tail=1, key=0)),
-                             (Edge(head=3, tail=1, key=0), Edge(head=3, tail=2, key=0))])}
+        r = {0: OrderedDict([((0, 3, 0), (0, 2, 0)),
+                             ((0, 1, 0), (0, 3, 0)),
+                             ((0, 2, 0), (0, 1, 0))]),
+             1: OrderedDict([((1, 0, 0), (1, 2, 0)),
+                             ((1, 2, 0), (1, 3, 0)),
+                             ((1, 3, 0), (1, 0, 0))]),
+             2: OrderedDict([((2, 3, 0), (2, 1, 0)),
+                             ((2, 1, 0), (2, 0, 0)),
+                             ((2, 0, 0), (2, 3, 0))]),
+             3: OrderedDict([((3, 2, 0), (3, 0, 0)),
+                             ((3, 0, 0), (3, 1, 0)),
+                             ((3, 1, 0), (3, 2, 0))])}
         nx.set_node_attributes(G, name='rotation', values=r)
 
         # orientation = {(1, 2, 0): 2, (0, 3, 0): 3, (1, 3, 0): 3, (2, 3, 0): 3,